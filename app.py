@@ -12,7 +12,7 @@ from decimal import Decimal, InvalidOperation
 import requests
 from flask import Flask, request, jsonify, send_from_directory, session, render_template, redirect
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text, inspect
+from sqlalchemy import text, inspect, event
 from sqlalchemy.exc import SQLAlchemyError
 from urllib.parse import quote
 from PyPDF2 import PdfReader
@@ -89,6 +89,8 @@ from finance_services import (
 )
 
 from budget_services import init_budget_services
+from utils_cache import clear_request_memo
+from utils_json import init_json_provider
 
 from whatsapp_commands import (
     parse_wa_text,
@@ -112,6 +114,21 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 app = Flask(__name__, static_folder="static", template_folder="templates")
 app.secret_key = os.getenv("SECRET_KEY", "dev-secret-key-change-me")
 app.config["JSON_AS_ASCII"] = False
+init_json_provider(app)
+
+# Cache HTTP dos estáticos (vale para /static/* e para os send_from_directory abaixo).
+# Nenhum arquivo tem hash no nome: só ícones e vendor, que não mudam, ganham max-age;
+# o resto (app.js, css, sw.js, manifest) sai com no-cache e revalida por ETag (304).
+_STATIC_LONG_CACHE_DIRS = ("icons/", "vendor/")
+
+
+def _static_max_age(filename: str | None) -> int | None:
+    if filename and filename.startswith(_STATIC_LONG_CACHE_DIRS):
+        return 7 * 24 * 3600
+    return None
+
+
+app.get_send_file_max_age = _static_max_age
 
 # Cookies de sessão
 app.config["SESSION_COOKIE_HTTPONLY"] = True
@@ -172,6 +189,7 @@ init_integrations(
 # DB
 # -------------------------
 db = SQLAlchemy(app)
+event.listen(db.session, "after_commit", clear_request_memo)
 
 
 class User(db.Model):
@@ -198,6 +216,12 @@ class Transaction(db.Model):
     origem = db.Column(db.String(16), nullable=False, default="APP")  # APP/WA/REC
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    # Filtros por usuário + período (mês/semana) viram range scan no índice,
+    # já na ordem usada pelas listagens (data, id).
+    __table_args__ = (
+        db.Index("ix_transactions_user_data_id", "user_id", "data", "id"),
+    )
+
 
 class Investment(db.Model):
     __tablename__ = "investments"
@@ -214,6 +238,11 @@ class Investment(db.Model):
 
     user = db.relationship("User", backref=db.backref("investments", lazy=True))
 
+    # Listagem (data desc, id desc) e séries por período saem na ordem do índice, sem sort.
+    __table_args__ = (
+        db.Index("ix_investments_user_data_id", "user_id", "data", "id"),
+    )
+
 
 class BudgetGoal(db.Model):
     __tablename__ = "budget_goals"
@@ -236,6 +265,11 @@ class BudgetGoal(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Metas são sempre lidas por usuário + mês (resumo e alertas de orçamento).
+    __table_args__ = (
+        db.Index("ix_budget_goals_user_ano_mes", "user_id", "ano", "mes"),
+    )
+
 
 class WaLink(db.Model):
     __tablename__ = "wa_links"
@@ -262,6 +296,11 @@ class CategoryRule(db.Model):
     priority = db.Column(db.Integer, nullable=False, server_default=text("10"))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    # Regras do usuário já saem na ordem de aplicação (priority desc, id desc).
+    __table_args__ = (
+        db.Index("ix_category_rules_user_priority_id", "user_id", "priority", "id"),
+    )
+
 
 class WaPending(db.Model):
     __tablename__ = "wa_pending"
@@ -331,30 +370,53 @@ def _bootstrap_schema():
             except Exception:
                 return t in insp.get_table_names()
 
+        # Colunas lidas uma vez por tabela; evita um get_columns (e um ALTER) por coluna já existente.
+        cols_cache: dict[str, set] = {}
+
         def has_col(t: str, c: str) -> bool:
-            if not has_table(t):
-                return False
-            cols = {col.get("name") for col in insp.get_columns(t)}
-            return c in cols
+            if t not in cols_cache:
+                if not has_table(t):
+                    return False
+                cols_cache[t] = {col.get("name") for col in insp.get_columns(t)}
+            return c in cols_cache[t]
 
         def add_col(t: str, col_name: str, col_ddl: str):
+            if has_col(t, col_name):
+                return
+
             if dialect == "postgresql":
                 db.session.execute(text(f"ALTER TABLE {t} ADD COLUMN IF NOT EXISTS {col_name} {col_ddl}"))
                 db.session.commit()
                 return
 
-            if has_col(t, col_name):
-                return
-
             try:
                 db.session.execute(text(f"ALTER TABLE {t} ADD COLUMN {col_name} {col_ddl}"))
                 db.session.commit()
             except SQLAlchemyError:
                 db.session.rollback()
 
+        def add_index(name: str, t: str, cols: str):
+            try:
+                db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {t} ({cols})"))
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+
         if has_table("users"):
             add_col("users", "name", "VARCHAR(120)")
 
+        if has_table("transactions"):
+            add_index("ix_transactions_user_data_id", "transactions", "user_id, data, id")
+
+        if has_table("investments"):
+            add_index("ix_investments_user_data_id", "investments", "user_id, data, id")
+
+        if has_table("budget_goals"):
+            add_index("ix_budget_goals_user_ano_mes", "budget_goals", "user_id, ano, mes")
+
+        if has_table("category_rules"):
+            add_index("ix_category_rules_user_priority_id", "category_rules", "user_id, priority, id")
+
         if has_table("recurring_rules"):
             add_col("recurring_rules", "start_date", "DATE")
             add_col("recurring_rules", "weekday", "INTEGER")
@@ -366,21 +428,13 @@ def _bootstrap_schema():
             add_col("recurring_rules", "categoria", "VARCHAR(80)")
             add_col("recurring_rules", "descricao", "TEXT")
 
+            # Backfill das duas colunas numa única passada pela tabela.
             try:
                 db.session.execute(text("""
                     UPDATE recurring_rules
-                    SET start_date = COALESCE(start_date, CURRENT_DATE)
-                    WHERE start_date IS NULL
-                """))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-
-            try:
-                db.session.execute(text("""
-                    UPDATE recurring_rules
-                    SET next_run = COALESCE(next_run, CURRENT_DATE)
-                    WHERE next_run IS NULL
+                    SET start_date = COALESCE(start_date, CURRENT_DATE),
+                        next_run = COALESCE(next_run, CURRENT_DATE)
+                    WHERE start_date IS NULL OR next_run IS NULL
                 """))
                 db.session.commit()
             except Exception:
@@ -467,23 +521,43 @@ register_whatsapp_routes(
 # -------------------------
 # Static / Frontend
 # -------------------------
+# Os templates das páginas não usam variáveis: renderiza uma vez por processo
+# e revalida pelo ETag (304 sem corpo). Em debug re-renderiza para ver edições.
+_PAGE_CACHE = {}
+
+
+def _render_page(name: str):
+    page = _PAGE_CACHE.get(name)
+    if page is None or app.debug:
+        html = render_template(name)
+        page = (html, hashlib.sha1(html.encode("utf-8")).hexdigest())
+        _PAGE_CACHE[name] = page
+
+    html, etag = page
+    resp = app.response_class(html, mimetype="text/html")
+    resp.set_etag(etag)
+    # no-cache = sempre revalida, então o redirect de login continua valendo.
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
 @app.get("/")
 def home():
     if not get_logged_user_id():
         return redirect("/login")
-    return render_template("index.html")
+    return _render_page("index.html")
 
 
 @app.get("/login")
 def login_page():
     if get_logged_user_id():
         return redirect("/")
-    return render_template("login.html")
+    return _render_page("login.html")
 
 
 @app.get("/offline.html")
 def offline_page():
-    return render_template("offline.html")
+    return _render_page("offline.html")
 
 
 @app.get("/manifest.json")
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
 
+from sqlalchemy import func
+
 _BudgetGoal = None
 _Transaction = None
 
@@ -81,26 +84,30 @@ def get_budget_summary(user_id, ano, mes):
     start, end = month_bounds(ano, mes)
     hoje = date.today()
 
-    txs = (
+    # Só (categoria, soma) por categoria; a normalização via title() junta variações de caixa.
+    rows = (
         _Transaction.query
+        .with_entities(_Transaction.categoria, func.sum(_Transaction.valor))
         .filter(_Transaction.user_id == user_id)
         .filter(_Transaction.tipo == "GASTO")
         .filter(_Transaction.data >= start)
         .filter(_Transaction.data < end)
+        .group_by(_Transaction.categoria)
         .all()
     )
 
-    gastos = {}
+    gastos = defaultdict(Decimal)
     total = Decimal("0")
 
-    for t in txs:
-        v = _to_decimal(t.valor)
+    for categoria, soma in rows:
+        v = _to_decimal(soma)
         total += v
-        cat = (t.categoria or "Outros").title()
-        gastos[cat] = gastos.get(cat, Decimal("0")) + v
+        cat = (categoria or "Outros").title()
+        gastos[cat] += v
 
     metas = (
         _BudgetGoal.query
+        .with_entities(_BudgetGoal.id, _BudgetGoal.categoria, _BudgetGoal.valor_meta)
         .filter_by(user_id=user_id, ano=ano, mes=mes)
         .all()
     )
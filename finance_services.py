@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 import calendar
+import re
+from collections import defaultdict
 from datetime import datetime, date, timedelta
 from decimal import Decimal
+from heapq import nlargest
+from operator import itemgetter
 
-import requests
+from sqlalchemy import func
 
+from utils_cache import request_memo
 from utils_core import month_bounds, fmt_brl, norm_word, tokenize, period_range
+from utils_integrations import http_session
+from utils_json import loads as json_loads
 
 WEEKDAY_MAP = {
     "segunda": 0,
@@ -19,6 +26,22 @@ WEEKDAY_MAP = {
     "domingo": 6,
 }
 
+# Categorias automáticas padrão; chaves já normalizadas (norm_word) no import.
+_DEFAULT_CATEGORY_KEYWORDS = tuple(
+    (cat, frozenset(norm_word(k) for k in keys))
+    for cat, keys in [
+        ("Alimentação", {"ifood", "i-food", "restaurante", "lanchonete", "pizza", "burguer", "hamburguer", "lanche", "mercado", "padaria", "cafe", "café"}),
+        ("Transporte", {"uber", "99", "taxi", "táxi", "onibus", "ônibus", "metro", "metrô", "gasolina", "etanol", "combustivel", "combustível", "estacionamento"}),
+        ("Moradia", {"aluguel", "condominio", "condomínio", "iptu", "prestacao", "prestação", "financiamento", "luz", "energia", "agua", "água", "internet"}),
+        ("Saúde", {"farmacia", "farmácia", "remedio", "remédio", "medico", "médico", "consulta", "exame", "dentista"}),
+        ("Educação", {"curso", "faculdade", "escola", "mensalidade", "livro"}),
+        ("Lazer", {"cinema", "show", "bar", "viagem", "hotel"}),
+        ("Impostos", {"imposto", "taxa", "multa"}),
+        ("Transferências", {"pix", "ted", "doc", "transferencia", "transferência"}),
+    ]
+)
+
+
 _CFG = {
     "Transaction": None,
     "Investment": None,
@@ -60,113 +83,150 @@ def _models():
     )
 
 
-def guess_category_from_text(user_id: int, full_text: str) -> str | None:
+def _category_rules(user_id: int) -> list[tuple[str, str | None]]:
+    """(chave normalizada, categoria formatada) das regras, na ordem de prioridade.
+
+    Memoizado só no request (o commit limpa o memo): um cache de processo ficaria
+    velho nos outros workers quando uma regra muda. norm_word/title rodam uma vez
+    por leitura, não a cada comparação. Chaves vazias ou com espaço nunca casam
+    com o haystack e ficam de fora.
+    """
     _, _, _, CategoryRule = _models()
-    tokens = set(tokenize(full_text))
 
-    try:
-        rules = (
+    def load():
+        rules = []
+        for pattern, categoria in (
             CategoryRule.query
+            .with_entities(CategoryRule.pattern, CategoryRule.categoria)
             .filter(CategoryRule.user_id == user_id)
             .order_by(CategoryRule.priority.desc(), CategoryRule.id.desc())
             .all()
-        )
-        for r in rules:
-            key = norm_word(r.pattern)
-            if not key:
-                continue
-            if key in tokens or any(key in t for t in tokens):
-                return (r.categoria or "").strip().title() or None
-    except Exception:
-        pass
+        ):
+            key = norm_word(pattern)
+            if key and " " not in key:
+                rules.append((key, (categoria or "").strip().title() or None))
+        return rules
 
-    default_category_keywords = [
-        ("Alimentação", {"ifood", "i-food", "restaurante", "lanchonete", "pizza", "burguer", "hamburguer", "lanche", "mercado", "padaria", "cafe", "café"}),
-        ("Transporte", {"uber", "99", "taxi", "táxi", "onibus", "ônibus", "metro", "metrô", "gasolina", "etanol", "combustivel", "combustível", "estacionamento"}),
-        ("Moradia", {"aluguel", "condominio", "condomínio", "iptu", "prestacao", "prestação", "financiamento", "luz", "energia", "agua", "água", "internet"}),
-        ("Saúde", {"farmacia", "farmácia", "remedio", "remédio", "medico", "médico", "consulta", "exame", "dentista"}),
-        ("Educação", {"curso", "faculdade", "escola", "mensalidade", "livro"}),
-        ("Lazer", {"cinema", "show", "bar", "viagem", "hotel"}),
-        ("Impostos", {"imposto", "taxa", "multa"}),
-        ("Transferências", {"pix", "ted", "doc", "transferencia", "transferência"}),
-    ]
+    return request_memo(("category_rules", user_id), load)
 
-    for cat, keys in default_category_keywords:
-        nkeys = {norm_word(k) for k in keys}
-        if tokens & nkeys:
-            return cat
 
-    return None
+def _period_summary(user_id: int, start: date, end: date) -> dict:
+    """Totais do período agregados no banco (memoizado no request).
 
+    sum_period, calc_projection, calc_alerts e as análises leem daqui; o SELECT
+    devolve uma linha por (tipo, origem, categoria), não uma por lançamento.
+    """
+    Transaction, _, _, _ = _models()
 
-def sum_period(user_id: int, start: date, end: date):
+    def build():
+        rows = (
+            Transaction.query
+            .with_entities(Transaction.tipo, Transaction.origem, Transaction.categoria, func.sum(Transaction.valor))
+            .filter(Transaction.user_id == user_id)
+            .filter(Transaction.data >= start)
+            .filter(Transaction.data < end)
+            .group_by(Transaction.tipo, Transaction.origem, Transaction.categoria)
+            .all()
+        )
+        receitas = Decimal("0")
+        gastos = Decimal("0")
+        gastos_variaveis = Decimal("0")
+        gastos_cat_total = Decimal("0")
+        categorias = defaultdict(Decimal)
+        for tipo, origem, categoria, total in rows:
+            v = Decimal(total or 0)
+            tipo = (tipo or "").upper()
+            if tipo == "RECEITA":
+                receitas += v
+                continue
+            gastos += v
+            if (origem or "").upper() != "REC":
+                gastos_variaveis += v
+            if tipo != "GASTO":
+                continue
+            gastos_cat_total += v
+            categorias[categoria] += v
+        return {
+            "receitas": receitas,
+            "gastos": gastos,
+            "gastos_variaveis": gastos_variaveis,
+            "gastos_categorias_total": gastos_cat_total,
+            "categorias": dict(categorias),  # dict comum no memo: leitura não cria chave
+        }
+
+    return request_memo(("summary", user_id, start, end), build)
+
+
+def _biggest_expense(user_id: int, start: date, end: date):
+    """Maior GASTO do período (valor, categoria, data), ou None."""
     Transaction, _, _, _ = _models()
-    q = (
+    return (
         Transaction.query
+        .with_entities(Transaction.valor, Transaction.categoria, Transaction.data)
         .filter(Transaction.user_id == user_id)
         .filter(Transaction.data >= start)
         .filter(Transaction.data < end)
-        .all()
+        .filter(func.upper(Transaction.tipo) == "GASTO")
+        .order_by(Transaction.valor.desc(), Transaction.id.asc())
+        .first()
     )
 
-    receitas = Decimal("0")
-    gastos = Decimal("0")
-    for t in q:
-        v = Decimal(t.valor or 0)
-        if (t.tipo or "").upper() == "RECEITA":
-            receitas += v
-        else:
-            gastos += v
 
-    return receitas, gastos, (receitas - gastos), q
+def guess_category_from_text(user_id: int, full_text: str) -> str | None:
+    tokens = set(tokenize(full_text))
+    # Tokens só têm [a-z0-9]; "key em algum token" vira uma busca no haystack
+    # desde que a chave não tenha espaço (senão casaria entre dois tokens).
+    haystack = " ".join(tokens)
+
+    try:
+        for key, categoria in _category_rules(user_id):
+            if key in haystack:
+                return categoria
+    except Exception:
+        pass
+
+    for cat, nkeys in _DEFAULT_CATEGORY_KEYWORDS:
+        if not tokens.isdisjoint(nkeys):
+            return cat
+
+    return None
+
+
+def sum_period(user_id: int, start: date, end: date):
+    summary = _period_summary(user_id, start, end)
+    receitas = summary["receitas"]
+    gastos = summary["gastos"]
+    return receitas, gastos, (receitas - gastos)
 
 
 def calc_projection(user_id: int, ref_date: date | None = None):
-    Transaction, _, RecurringRule, _ = _models()
+    _, _, RecurringRule, _ = _models()
     today = ref_date or datetime.utcnow().date()
     start, end = month_bounds(today.year, today.month)
 
-    rows = (
-        Transaction.query
-        .filter(Transaction.user_id == user_id)
-        .filter(Transaction.data >= start)
-        .filter(Transaction.data < end)
-        .all()
-    )
-
-    receitas = Decimal("0")
-    gastos = Decimal("0")
-    gastos_variaveis = Decimal("0")
-
-    for t in rows:
-        v = Decimal(t.valor or 0)
-        if (t.tipo or "").upper() == "RECEITA":
-            receitas += v
-        else:
-            gastos += v
-            if (t.origem or "").upper() != "REC":
-                gastos_variaveis += v
+    summary = _period_summary(user_id, start, end)
+    gastos_variaveis = summary["gastos_variaveis"]
 
-    saldo_atual = receitas - gastos
+    saldo_atual = summary["receitas"] - summary["gastos"]
 
     future_receitas_rec = Decimal("0")
     future_gastos_rec = Decimal("0")
 
+    # Janela (hoje, fim do mês) comparada no WHERE; só tipo/valor das regras que caem nela.
     recurring_rules = (
         RecurringRule.query
+        .with_entities(RecurringRule.tipo, RecurringRule.valor)
         .filter(RecurringRule.user_id == user_id, RecurringRule.is_active.is_(True))
+        .filter(RecurringRule.next_run > today, RecurringRule.next_run < end)
         .all()
     )
 
-    for r in recurring_rules:
-        if not r.next_run:
-            continue
-        if today < r.next_run < end:
-            val = Decimal(r.valor or 0)
-            if (r.tipo or "").upper() == "RECEITA":
-                future_receitas_rec += val
-            else:
-                future_gastos_rec += val
+    for tipo, valor in recurring_rules:
+        val = Decimal(valor or 0)
+        if (tipo or "").upper() == "RECEITA":
+            future_receitas_rec += val
+        else:
+            future_gastos_rec += val
 
     days_elapsed = max(1, today.day)
     days_in_month = calendar.monthrange(today.year, today.month)[1]
@@ -189,31 +249,18 @@ def calc_projection(user_id: int, ref_date: date | None = None):
     }
 
 
-def calc_alerts(user_id: int, ref_date: date | None = None):
+def calc_alerts(user_id: int, ref_date: date | None = None, projection: dict | None = None):
     Transaction, _, _, _ = _models()
     today = ref_date or datetime.utcnow().date()
     start, end = month_bounds(today.year, today.month)
 
-    current_rows = (
-        Transaction.query
-        .filter(Transaction.user_id == user_id)
-        .filter(Transaction.data >= start)
-        .filter(Transaction.data < end)
-        .all()
-    )
-
-    cat_current = {}
-    total_gastos = Decimal("0")
-
-    for t in current_rows:
-        if (t.tipo or "").upper() != "GASTO":
-            continue
-        v = Decimal(t.valor or 0)
-        total_gastos += v
-        cat_current[t.categoria] = cat_current.get(t.categoria, Decimal("0")) + v
+    summary = _period_summary(user_id, start, end)
+    cat_current = summary["categorias"]
+    total_gastos = summary["gastos_categorias_total"]
 
     alerts = []
-    projection = calc_projection(user_id, today)
+    if projection is None:
+        projection = calc_projection(user_id, today)
 
     if projection["alerta_negativo"]:
         alerts.append({
@@ -222,8 +269,11 @@ def calc_alerts(user_id: int, ref_date: date | None = None):
             "mensagem": f"Seu saldo projetado para o fim do mês é R$ {fmt_brl(projection['saldo_previsto'])}.",
         })
 
-    if total_gastos > 0:
-        cat_top = max(cat_current.items(), key=lambda kv: kv[1])
+    # Uma passada só: o maior da categoria sai do mesmo top 5 usado no histórico.
+    top_current = nlargest(5, cat_current.items(), key=itemgetter(1))
+
+    if total_gastos > 0 and top_current:
+        cat_top = top_current[0]
         if (cat_top[1] / total_gastos) >= Decimal("0.45"):
             alerts.append({
                 "nivel": "medio",
@@ -231,35 +281,36 @@ def calc_alerts(user_id: int, ref_date: date | None = None):
                 "mensagem": f"{cat_top[0]} representa {(cat_top[1] / total_gastos * 100):.0f}% dos seus gastos.",
             })
 
-    for cat, current_value in sorted(cat_current.items(), key=lambda kv: kv[1], reverse=True)[:5]:
-        hist_values = []
-        for i in range(1, 4):
-            base_month = today.month - i
-            base_year = today.year
-            while base_month <= 0:
-                base_month += 12
-                base_year -= 1
-
-            h_start, h_end = month_bounds(base_year, base_month)
-            rows = (
-                Transaction.query
-                .filter(Transaction.user_id == user_id)
-                .filter(Transaction.tipo == "GASTO")
-                .filter(Transaction.data >= h_start)
-                .filter(Transaction.data < h_end)
-                .filter(Transaction.categoria == cat)
-                .all()
-            )
-            hist_values.append(sum(Decimal(r.valor or 0) for r in rows))
-
-        if hist_values:
-            media_hist = sum(hist_values) / Decimal(len(hist_values))
-            if media_hist > 0 and current_value >= media_hist * Decimal("1.40"):
-                alerts.append({
-                    "nivel": "medio",
-                    "titulo": f"{cat} acima da média",
-                    "mensagem": f"Você gastou R$ {fmt_brl(current_value)} em {cat}; média recente R$ {fmt_brl(media_hist)}.",
-                })
+    # Histórico dos 3 meses anteriores numa única consulta agregada
+    hist_month = today.month - 3
+    hist_year = today.year
+    while hist_month <= 0:
+        hist_month += 12
+        hist_year -= 1
+    hist_start, _ = month_bounds(hist_year, hist_month)
+
+    hist_totals = {}
+    if top_current:
+        hist_totals = dict(
+            Transaction.query
+            .with_entities(Transaction.categoria, func.sum(Transaction.valor))
+            .filter(Transaction.user_id == user_id)
+            .filter(Transaction.tipo == "GASTO")
+            .filter(Transaction.data >= hist_start)
+            .filter(Transaction.data < start)
+            .filter(Transaction.categoria.in_([cat for cat, _ in top_current]))
+            .group_by(Transaction.categoria)
+            .all()
+        )
+
+    for cat, current_value in top_current:
+        media_hist = Decimal(hist_totals.get(cat) or 0) / Decimal(3)
+        if media_hist > 0 and current_value >= media_hist * Decimal("1.40"):
+            alerts.append({
+                "nivel": "medio",
+                "titulo": f"{cat} acima da média",
+                "mensagem": f"Você gastou R$ {fmt_brl(current_value)} em {cat}; média recente R$ {fmt_brl(media_hist)}.",
+            })
 
     return alerts[:5]
 
@@ -276,6 +327,34 @@ def calc_patrimonio_series(user_id: int, months: int = 6):
         first_month += 12
         first_year -= 1
 
+    window_start = date(first_year, first_month, 1)
+    _, window_end = month_bounds(today.year, today.month)
+
+    # Dois SELECTs agrupados por (mês, tipo) cobrem a janela toda, em vez de 2 por mês.
+    # O mês vira um inteiro só (ano * 12 + mês); menos o do início da janela, é o índice
+    # do acumulador.
+    net = [Decimal("0")] * months
+    first_key = first_year * 12 + first_month
+
+    def add_monthly_totals(Model, signs):
+        month_key = func.extract("year", Model.data) * 12 + func.extract("month", Model.data)
+        rows = (
+            Model.query
+            .with_entities(month_key, Model.tipo, func.sum(Model.valor))
+            .filter(Model.user_id == user_id)
+            .filter(Model.data >= window_start)
+            .filter(Model.data < window_end)
+            .group_by(month_key, Model.tipo)
+            .all()
+        )
+        for key, tipo, total in rows:
+            sign = signs.get((tipo or "").upper())
+            if sign:
+                net[int(key) - first_key] += sign * Decimal(total or 0)
+
+    add_monthly_totals(Transaction, {"RECEITA": 1, "GASTO": -1})
+    add_monthly_totals(Investment, {"APORTE": 1, "RESGATE": -1})
+
     running = Decimal("0")
 
     for offset in range(months):
@@ -285,29 +364,7 @@ def calc_patrimonio_series(user_id: int, months: int = 6):
             month -= 12
             year += 1
 
-        start, end = month_bounds(year, month)
-
-        txs = (
-            Transaction.query
-            .filter(Transaction.user_id == user_id)
-            .filter(Transaction.data >= start)
-            .filter(Transaction.data < end)
-            .all()
-        )
-        invs = (
-            Investment.query
-            .filter(Investment.user_id == user_id)
-            .filter(Investment.data >= start)
-            .filter(Investment.data < end)
-            .all()
-        )
-
-        receitas = sum(Decimal(t.valor or 0) for t in txs if (t.tipo or "").upper() == "RECEITA")
-        gastos = sum(Decimal(t.valor or 0) for t in txs if (t.tipo or "").upper() == "GASTO")
-        aportes = sum(Decimal(i.valor or 0) for i in invs if (i.tipo or "").upper() == "APORTE")
-        resgates = sum(Decimal(i.valor or 0) for i in invs if (i.tipo or "").upper() == "RESGATE")
-
-        running += (receitas - gastos) + (aportes - resgates)
+        running += net[offset]
 
         labels.append(f"{month:02d}/{str(year)[2:]}")
         values.append(float(running))
@@ -316,67 +373,57 @@ def calc_patrimonio_series(user_id: int, months: int = 6):
 
 
 def sum_investments_position(user_id: int):
+    """Totais de aportes/resgates e a quantidade de lançamentos, agregados no banco."""
     _, Investment, _, _ = _models()
-    invs = Investment.query.filter_by(user_id=user_id).all()
+    rows = (
+        Investment.query
+        .with_entities(Investment.tipo, func.sum(Investment.valor), func.count(Investment.id))
+        .filter(Investment.user_id == user_id)
+        .group_by(Investment.tipo)
+        .all()
+    )
     aportes = Decimal("0")
     resgates = Decimal("0")
-    for it in invs:
-        v = Decimal(it.valor or 0)
-        if (it.tipo or "").upper() == "APORTE":
+    quantidade = 0
+    for tipo, total, n in rows:
+        v = Decimal(total or 0)
+        quantidade += n
+        if (tipo or "").upper() == "APORTE":
             aportes += v
         else:
             resgates += v
     patrimonio_investido = aportes - resgates
-    return aportes, resgates, patrimonio_investido, invs
+    return aportes, resgates, patrimonio_investido, quantidade
 
 
-def _top_categories_month(user_id: int):
-    Transaction, _, _, _ = _models()
+def _top_categories_month(user_id: int, n: int = 5):
     today = datetime.utcnow().date()
     start, end = month_bounds(today.year, today.month)
 
-    rows = (
-        Transaction.query
-        .filter(Transaction.user_id == user_id)
-        .filter(Transaction.tipo == "GASTO")
-        .filter(Transaction.data >= start)
-        .filter(Transaction.data < end)
-        .all()
-    )
-
-    cat_map = {}
-    total = Decimal("0")
-    for t in rows:
-        v = Decimal(t.valor or 0)
-        total += v
-        cat_map[t.categoria] = cat_map.get(t.categoria, Decimal("0")) + v
-
-    ordered = sorted(cat_map.items(), key=lambda kv: kv[1], reverse=True)
-    return ordered, total
+    summary = _period_summary(user_id, start, end)
+    top = nlargest(n, summary["categorias"].items(), key=itemgetter(1))
+    return top, summary["gastos_categorias_total"]
 
 
 def build_ai_finance_context(user_id: int) -> str:
     Transaction, Investment, _, _ = _models()
     today = datetime.utcnow().date()
     month_start, month_end = month_bounds(today.year, today.month)
-    receitas_mes, gastos_mes, saldo_mes, rows_mes = sum_period(user_id, month_start, month_end)
+    receitas_mes, gastos_mes, saldo_mes = sum_period(user_id, month_start, month_end)
     proj = calc_projection(user_id, today)
-    alerts = calc_alerts(user_id, today)
-    aportes, resgates, patrimonio_investido, invs = sum_investments_position(user_id)
+    alerts = calc_alerts(user_id, today, projection=proj)
+    aportes, resgates, patrimonio_investido, qtd_invs = sum_investments_position(user_id)
 
-    top_cats = {}
-    for t in rows_mes:
-        if (t.tipo or "").upper() != "GASTO":
-            continue
-        v = Decimal(t.valor or 0)
-        top_cats[t.categoria] = top_cats.get(t.categoria, Decimal("0")) + v
+    top_cats = _period_summary(user_id, month_start, month_end)["categorias"]
 
     top_lines = []
-    for cat, val in sorted(top_cats.items(), key=lambda kv: kv[1], reverse=True)[:5]:
+    for cat, val in nlargest(5, top_cats.items(), key=itemgetter(1)):
         top_lines.append(f"- {cat}: R$ {fmt_brl(val)}")
 
+    # Só as colunas usadas nas linhas do contexto (tuplas nomeadas, sem objetos ORM).
     last_txs = (
         Transaction.query
+        .with_entities(Transaction.data, Transaction.tipo, Transaction.categoria, Transaction.valor, Transaction.descricao)
         .filter(Transaction.user_id == user_id)
         .order_by(Transaction.data.desc(), Transaction.id.desc())
         .limit(8)
@@ -388,6 +435,7 @@ def build_ai_finance_context(user_id: int) -> str:
 
     last_invs = (
         Investment.query
+        .with_entities(Investment.data, Investment.tipo, Investment.ativo, Investment.valor, Investment.descricao)
         .filter(Investment.user_id == user_id)
         .order_by(Investment.data.desc(), Investment.id.desc())
         .limit(5)
@@ -415,7 +463,7 @@ def build_ai_finance_context(user_id: int) -> str:
         f"- Total aportado: R$ {fmt_brl(aportes)}\n"
         f"- Total resgatado: R$ {fmt_brl(resgates)}\n"
         f"- Patrimônio investido líquido: R$ {fmt_brl(patrimonio_investido)}\n"
-        f"- Quantidade de lançamentos de investimento: {len(invs)}\n\n"
+        f"- Quantidade de lançamentos de investimento: {qtd_invs}\n\n"
         f"Top categorias de gasto no mês:\n" + ("\n".join(top_lines) if top_lines else "- sem dados") + "\n\n"
         f"Alertas atuais:\n" + ("\n".join(alert_lines) if alert_lines else "- nenhum alerta importante") + "\n\n"
         f"Últimos lançamentos financeiros:\n" + ("\n".join(tx_lines) if tx_lines else "- sem lançamentos") + "\n\n"
@@ -423,26 +471,31 @@ def build_ai_finance_context(user_id: int) -> str:
     )
 
 
+# Montado uma vez no import e já normalizado (norm_word), como o texto comparado;
+# variantes com acento viram a mesma chave.
+_FINANCE_QUESTION_KEYWORDS = frozenset(norm_word(k) for k in (
+    "gastei", "gasto", "gastos", "receita", "receitas", "saldo", "sobrou", "faltando",
+    "projecao", "projeção", "alerta", "alertas", "investi", "investido",
+    "investimentos", "patrimonio", "patrimônio", "aporte", "resgate", "mercado",
+    "categoria", "categorias", "dinheiro", "financeiro", "financas", "finanças",
+    "mes", "mês", "semana", "hoje", "quanto", "posso", "tenho", "score", "melhorar",
+))
+# Uma alternância compilada varre o texto numa passada, em vez de um "in" por palavra.
+_FINANCE_QUESTION_RE = re.compile("|".join(map(re.escape, sorted(_FINANCE_QUESTION_KEYWORDS))))
+
+
 def looks_like_finance_question(text_msg: str) -> bool:
     txt = norm_word(text_msg)
     if not txt:
         return False
-
-    keywords = {
-        "gastei", "gasto", "gastos", "receita", "receitas", "saldo", "sobrou", "faltando",
-        "projecao", "projeção", "alerta", "alertas", "investi", "investido",
-        "investimentos", "patrimonio", "patrimônio", "aporte", "resgate", "mercado",
-        "categoria", "categorias", "dinheiro", "financeiro", "financas", "finanças",
-        "mes", "mês", "semana", "hoje", "quanto", "posso", "tenho", "score", "melhorar"
-    }
-    return any(k in txt for k in keywords)
+    return _FINANCE_QUESTION_RE.search(txt) is not None
 
 
 def _local_finance_answer(user_id: int, question: str) -> str | None:
     q = norm_word(question)
     today = datetime.utcnow().date()
 
-    receitas_mes, gastos_mes, saldo_mes, _ = sum_period(
+    receitas_mes, gastos_mes, saldo_mes = sum_period(
         user_id,
         *month_bounds(today.year, today.month)
     )
@@ -495,7 +548,7 @@ def _local_finance_answer(user_id: int, question: str) -> str | None:
         )
 
     if "alerta" in q or "alertas" in q:
-        alerts = calc_alerts(user_id, today)
+        alerts = calc_alerts(user_id, today, projection=proj)
         if not alerts:
             return "✅ Você não tem alertas financeiros importantes no momento."
         a = alerts[0]
@@ -540,14 +593,14 @@ def ask_openai_finance_assistant(user_id: int, question: str) -> str:
         "max_tokens": 350,
     }
 
-    r = requests.post(
+    r = http_session.post(
         "https://api.openai.com/v1/chat/completions",
         headers=openai_headers(),
         json=payload,
         timeout=120,
     )
     r.raise_for_status()
-    content = ((r.json().get("choices") or [{}])[0].get("message") or {}).get("content") or ""
+    content = ((json_loads(r.content).get("choices") or [{}])[0].get("message") or {}).get("content") or ""
     content = str(content).strip()
     return content or "Não consegui montar uma resposta agora. Tente novamente em instantes."
 
@@ -562,7 +615,7 @@ def reply_finance_question(user_id: int, text_msg: str) -> str:
 
 def make_resumo_text(user_id: int, kind: str):
     start, end, label = period_range(kind)
-    receitas, gastos, saldo, _ = sum_period(user_id, start, end)
+    receitas, gastos, saldo = sum_period(user_id, start, end)
     return (
         f"📊 Resumo ({label}):\n"
         f"Receitas: R$ {fmt_brl(receitas)}\n"
@@ -573,19 +626,13 @@ def make_resumo_text(user_id: int, kind: str):
 
 def make_analise_text(user_id: int, kind: str | None):
     start, end, label = period_range(kind or "mes")
-    receitas, gastos, saldo, rows = sum_period(user_id, start, end)
-
-    cat_map = {}
-    biggest = None
-    for t in rows:
-        v = Decimal(t.valor or 0)
-        if (t.tipo or "").upper() != "GASTO":
-            continue
-        cat_map[t.categoria] = cat_map.get(t.categoria, Decimal("0")) + v
-        if biggest is None or v > Decimal(biggest.valor or 0):
-            biggest = t
-
-    top = sorted(cat_map.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    receitas, gastos, saldo = sum_period(user_id, start, end)
+
+    summary = _period_summary(user_id, start, end)
+    cat_map = summary["categorias"]
+    biggest = _biggest_expense(user_id, start, end)
+
+    top = nlargest(5, cat_map.items(), key=itemgetter(1))
     top_lines = []
     total_gastos = Decimal(gastos or 0)
     for cat, val in top:
@@ -620,7 +667,7 @@ def make_analise_text(user_id: int, kind: str | None):
         msg.append("\nTop gastos por categoria:")
         msg.extend(top_lines)
 
-    if biggest and Decimal(biggest.valor or 0) > 0:
+    if biggest and biggest.valor > 0:
         msg.append(f"\nMaior gasto: R$ {fmt_brl(biggest.valor)} em {biggest.categoria} ({biggest.data.isoformat()})")
 
     if alerts:
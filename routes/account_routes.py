@@ -7,11 +7,11 @@ def register_account_routes(app, db, User, get_logged_user_id, get_logged_email,
         uid = get_logged_user_id()
         email = get_logged_email()
 
+        # Só a coluna name, pela chave primária: um rename feito em outro
+        # dispositivo aparece logo, sem montar o objeto User inteiro.
         name = None
         if uid:
-            u = User.query.filter_by(id=uid).first()
-            if u:
-                name = u.name
+            name = db.session.query(User.name).filter_by(id=uid).scalar()
 
         return jsonify(email=email, user_id=uid, name=name)
 
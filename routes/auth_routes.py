@@ -1,4 +1,10 @@
+from collections import namedtuple
+
 from flask import request, jsonify, session
+from sqlalchemy.exc import IntegrityError
+
+# Dados que login_user grava na sessão, lidos antes do commit (que expira o objeto).
+_SessionUser = namedtuple("_SessionUser", "id email name")
 
 
 def register_auth_routes(app, db, User, MIN_PASSWORD_LEN, normalize_email, hash_password, login_user):
@@ -32,9 +38,10 @@ def register_auth_routes(app, db, User, MIN_PASSWORD_LEN, normalize_email, hash_
                 existing.password_set = True
                 if nome and not existing.name:
                     existing.name = nome
+                who = _SessionUser(existing.id, existing.email, existing.name)
                 db.session.commit()
-                login_user(existing)
-                return jsonify(email=existing.email, name=existing.name, claimed=True)
+                login_user(who)
+                return jsonify(email=who.email, name=who.name, claimed=True)
             return jsonify(error="Email já cadastrado"), 400
 
         u = User(
@@ -44,10 +51,17 @@ def register_auth_routes(app, db, User, MIN_PASSWORD_LEN, normalize_email, hash_
             password_set=True,
         )
         db.session.add(u)
-        db.session.commit()
-
-        login_user(u)
-        return jsonify(email=u.email, name=u.name)
+        # flush gera o id; os dados saem antes do commit (sem SELECT extra para
+        # recarregar o usuário expirado) e a sessão só é gravada se o commit passar.
+        try:
+            db.session.flush()
+            who = _SessionUser(u.id, u.email, u.name)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # outro cadastro com o mesmo email ganhou a corrida
+            return jsonify(error="Email já cadastrado"), 400
+        login_user(who)
+        return jsonify(email=who.email, name=who.name)
 
     @app.post("/api/login")
     def api_login():
@@ -81,11 +95,18 @@ def register_auth_routes(app, db, User, MIN_PASSWORD_LEN, normalize_email, hash_
         if nova != confirmar:
             return jsonify(error="Senhas não conferem"), 400
 
-        u = User.query.filter_by(email=email).first()
-        if not u:
+        # UPDATE direto pelo email (único); rowcount diz se o usuário existia.
+        updated = (
+            User.query
+            .filter_by(email=email)
+            .update({
+                User.password_hash: hash_password(nova),
+                User.password_set: True,
+            }, synchronize_session=False)
+        )
+        if not updated:
+            db.session.rollback()
             return jsonify(error="Email não encontrado"), 404
 
-        u.password_hash = hash_password(nova)
-        u.password_set = True
         db.session.commit()
         return jsonify(ok=True)
@@ -105,15 +105,15 @@ def register_budget_routes(app, db, BudgetGoal, require_login, parse_money_br_to
         if not uid:
             return jsonify(error="Não logado"), 401
 
-        item = BudgetGoal.query.filter_by(
+        deleted = BudgetGoal.query.filter_by(
             id=id,
             user_id=uid
-        ).first()
+        ).delete(synchronize_session=False)
 
-        if not item:
+        if not deleted:
+            db.session.rollback()
             return jsonify(error="Não encontrado"), 404
 
-        db.session.delete(item)
         db.session.commit()
 
         return jsonify(ok=True)
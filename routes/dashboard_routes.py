@@ -1,7 +1,9 @@
+from collections import defaultdict
 from datetime import datetime, date
 from decimal import Decimal
 
 from flask import request, jsonify
+from sqlalchemy import case, func
 
 
 def register_dashboard_routes(
@@ -29,23 +31,21 @@ def register_dashboard_routes(
         start = date(ano, mes, 1)
         end = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
 
-        q = (
+        # Receitas e gastos em um único SELECT (SUM condicional), sem carregar as linhas.
+        is_receita = func.upper(func.coalesce(Transaction.tipo, "")) == "RECEITA"
+        receitas, gastos = (
             Transaction.query
+            .with_entities(
+                func.coalesce(func.sum(case((is_receita, Transaction.valor), else_=0)), 0),
+                func.coalesce(func.sum(case((is_receita, 0), else_=Transaction.valor)), 0),
+            )
             .filter(Transaction.user_id == uid)
             .filter(Transaction.data >= start)
             .filter(Transaction.data < end)
-            .all()
+            .one()
         )
-
-        receitas = Decimal("0")
-        gastos = Decimal("0")
-
-        for t in q:
-            v = Decimal(t.valor or 0)
-            if (t.tipo or "").upper() == "RECEITA":
-                receitas += v
-            else:
-                gastos += v
+        receitas = Decimal(receitas)
+        gastos = Decimal(gastos)
 
         saldo = receitas - gastos
         return jsonify(
@@ -54,19 +54,8 @@ def register_dashboard_routes(
             saldo=float(saldo),
         )
 
-    @app.get("/api/insights_dashboard")
-    def api_insights_dashboard():
-        uid = require_login()
-        if not uid:
-            return jsonify(error="Não logado"), 401
-
-        try:
-            mes = int(request.args.get("mes", "0"))
-            ano = int(request.args.get("ano", "0"))
-        except Exception:
-            mes = 0
-            ano = 0
-
+    def _insights_payload(uid, mes, ano):
+        """Score/insight do mês; devolve também receitas e gastos (Decimal) para reuso."""
         today = datetime.utcnow().date()
         if not (1 <= mes <= 12):
             mes = today.month
@@ -78,23 +67,28 @@ def register_dashboard_routes(
 
         rows = (
             Transaction.query
+            .with_entities(Transaction.tipo, Transaction.categoria, func.sum(Transaction.valor))
             .filter(Transaction.user_id == uid)
             .filter(Transaction.data >= start)
             .filter(Transaction.data < end)
+            .group_by(Transaction.tipo, Transaction.categoria)
             .all()
         )
 
         receitas = Decimal("0")
         gastos = Decimal("0")
-        categorias = {}
+        categorias = defaultdict(Decimal)
 
-        for t in rows:
-            v = Decimal(t.valor or 0)
-            if (t.tipo or "").upper() == "RECEITA":
+        for tipo, categoria, total in rows:
+            v = Decimal(total or 0)
+            if (tipo or "").upper() == "RECEITA":
                 receitas += v
             else:
                 gastos += v
-                categorias[t.categoria] = categorias.get(t.categoria, Decimal("0")) + v
+                categorias[categoria] += v
+
+        # Maior total primeiro; empates pelo nome da categoria (o GROUP BY não garante ordem).
+        top_categorias = sorted(categorias.items(), key=lambda kv: (-kv[1], kv[0] or ""))
 
         score = 50
         status = "atencao"
@@ -124,31 +118,40 @@ def register_dashboard_routes(
             insight = "⚠️ Seus gastos estão maiores que suas receitas neste mês."
             status = "critico"
         elif categorias:
-            top = max(categorias.items(), key=lambda x: x[1])
-            insight = f"Você gastou mais em {top[0]} neste mês."
+            insight = f"Você gastou mais em {top_categorias[0][0]} neste mês."
         else:
             insight = "Seu controle financeiro está equilibrado."
 
-        top_categorias = sorted(categorias.items(), key=lambda x: x[1], reverse=True)
-
-        return jsonify(
-            score=score,
-            status=status,
-            insight=insight,
-            categorias=[c[0] for c in top_categorias],
-            valores=[float(c[1]) for c in top_categorias],
-            receitas=float(receitas),
-            gastos=float(gastos),
-        )
+        payload = {
+            "score": score,
+            "status": status,
+            "insight": insight,
+            "categorias": [c[0] for c in top_categorias],
+            "valores": [float(c[1]) for c in top_categorias],
+            "receitas": float(receitas),
+            "gastos": float(gastos),
+        }
+        return payload, receitas, gastos
 
-    @app.get("/api/projecao")
-    def api_projecao():
+    @app.get("/api/insights_dashboard")
+    def api_insights_dashboard():
         uid = require_login()
         if not uid:
             return jsonify(error="Não logado"), 401
 
+        try:
+            mes = int(request.args.get("mes", "0"))
+            ano = int(request.args.get("ano", "0"))
+        except Exception:
+            mes = 0
+            ano = 0
+
+        payload, _, _ = _insights_payload(uid, mes, ano)
+        return jsonify(payload)
+
+    def _projecao_payload(uid):
         p = calc_projection(uid)
-        return jsonify({
+        return {
             "saldo_atual": float(p["saldo_atual"]),
             "receitas_recorrentes_futuras": float(p["receitas_recorrentes_futuras"]),
             "gastos_recorrentes_futuros": float(p["gastos_recorrentes_futuros"]),
@@ -157,7 +160,46 @@ def register_dashboard_routes(
             "saldo_previsto": float(p["saldo_previsto"]),
             "dias_restantes": p["dias_restantes"],
             "alerta_negativo": p["alerta_negativo"],
-        })
+        }
+
+    @app.get("/api/projecao")
+    def api_projecao():
+        uid = require_login()
+        if not uid:
+            return jsonify(error="Não logado"), 401
+
+        return jsonify(_projecao_payload(uid))
+
+    @app.get("/api/painel")
+    def api_painel():
+        """Tela inicial numa chamada só: totais, insights, projeção e patrimônio.
+
+        Os totais do mês saem da mesma agregação dos insights, sem outra consulta.
+        """
+        uid = require_login()
+        if not uid:
+            return jsonify(error="Não logado"), 401
+
+        try:
+            mes = int(request.args.get("mes", "0"))
+            ano = int(request.args.get("ano", "0"))
+            months = max(3, min(12, int(request.args.get("months", "6"))))
+        except Exception:
+            return jsonify(error="Parâmetros inválidos"), 400
+
+        insights, receitas, gastos = _insights_payload(uid, mes, ano)
+        labels, values = calc_patrimonio_series(uid, months)
+
+        return jsonify(
+            dashboard={
+                "receitas": float(receitas),
+                "gastos": float(gastos),
+                "saldo": float(receitas - gastos),
+            },
+            insights=insights,
+            projecao=_projecao_payload(uid),
+            patrimonio={"labels": labels, "values": values},
+        )
 
     @app.get("/api/alertas")
     def api_alertas():
@@ -184,10 +226,19 @@ def register_dashboard_routes(
         if not uid:
             return jsonify({"error": "Não logado"}), 401
 
-        q = Transaction.query.filter(Transaction.user_id == uid).all()
-
-        receitas = sum(Decimal(t.valor or 0) for t in q if (t.tipo or "").upper() == "RECEITA")
-        gastos = sum(Decimal(t.valor or 0) for t in q if (t.tipo or "").upper() == "GASTO")
+        # Totais de toda a conta somados no banco; só a tupla (receitas, gastos) volta.
+        tipo = func.upper(func.coalesce(Transaction.tipo, ""))
+        receitas, gastos = (
+            Transaction.query
+            .with_entities(
+                func.coalesce(func.sum(case((tipo == "RECEITA", Transaction.valor), else_=0)), 0),
+                func.coalesce(func.sum(case((tipo == "GASTO", Transaction.valor), else_=0)), 0),
+            )
+            .filter(Transaction.user_id == uid)
+            .one()
+        )
+        receitas = Decimal(receitas)
+        gastos = Decimal(gastos)
         saldo = receitas - gastos
 
         score = 50
@@ -1,7 +1,21 @@
+from datetime import date
+
 from flask import request, jsonify
+from sqlalchemy import and_, or_
 
 
 def register_finance_routes(app, db, Transaction, require_login, parse_date_any, parse_brl_value, guess_category_from_text):
+    LIST_COLUMNS = (
+        Transaction.id,
+        Transaction.data,
+        Transaction.tipo,
+        Transaction.categoria,
+        Transaction.descricao,
+        Transaction.valor,
+        Transaction.origem,
+        Transaction.created_at,
+    )
+
     @app.get("/api/lancamentos")
     def api_list_lancamentos():
         uid = require_login()
@@ -11,9 +25,34 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
         limit = int(request.args.get("limit", 30))
         limit = max(1, min(limit, 200))
 
-        rows = (
+        # Só as colunas da resposta, como tuplas (sem montar objetos ORM por linha).
+        query = (
             Transaction.query
+            .with_entities(*LIST_COLUMNS)
             .filter(Transaction.user_id == uid)
+        )
+
+        # Paginação por cursor (keyset): continua depois do último (data, id) recebido.
+        # Segue o índice user_id+data+id, sem OFFSET que relê as páginas anteriores.
+        # Sem antes_id, o cursor é só a data: vêm os dias anteriores a ela, inteiros.
+        antes_data = request.args.get("antes_data")
+        if antes_data:
+            antes_id = request.args.get("antes_id")
+            try:
+                cursor_data = date.fromisoformat(antes_data)
+                cursor_id = int(antes_id) if antes_id else None
+            except ValueError:
+                return jsonify(error="Cursor de paginação inválido"), 400
+            if cursor_id is None:
+                query = query.filter(Transaction.data < cursor_data)
+            else:
+                query = query.filter(or_(
+                    Transaction.data < cursor_data,
+                    and_(Transaction.data == cursor_data, Transaction.id < cursor_id),
+                ))
+
+        rows = (
+            query
             .order_by(Transaction.data.desc(), Transaction.id.desc())
             .limit(limit)
             .all()
@@ -33,19 +72,18 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
                 "criado_em": t.created_at.isoformat() if t.created_at else "",
             })
 
-        return jsonify(items=items)
+        proximo = None
+        if len(rows) == limit:
+            last = rows[-1]
+            proximo = {"antes_data": last.data.isoformat(), "antes_id": last.id}
 
-    @app.post("/api/lancamentos")
-    def api_create_lancamento():
-        uid = require_login()
-        if not uid:
-            return jsonify(error="Não logado"), 401
-
-        dataj = request.get_json(silent=True) or {}
+        return jsonify(items=items, proximo=proximo)
 
+    def _new_transaction(uid, dataj):
+        """Valida um lançamento do app; devolve (Transaction, None) ou (None, erro)."""
         tipo = str(dataj.get("tipo") or "").strip().upper()
         if tipo not in ("RECEITA", "GASTO"):
-            return jsonify(error="Tipo inválido"), 400
+            return None, "Tipo inválido"
 
         descricao = str(dataj.get("descricao") or "").strip() or None
         raw_categoria = str(dataj.get("categoria") or "").strip()
@@ -58,9 +96,9 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
         try:
             valor = parse_brl_value(dataj.get("valor"))
         except ValueError as e:
-            return jsonify(error=str(e)), 400
+            return None, str(e)
 
-        t = Transaction(
+        return Transaction(
             user_id=uid,
             tipo=tipo,
             data=d,
@@ -68,11 +106,50 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
             descricao=descricao,
             valor=valor,
             origem="APP",
-        )
+        ), None
+
+    @app.post("/api/lancamentos")
+    def api_create_lancamento():
+        uid = require_login()
+        if not uid:
+            return jsonify(error="Não logado"), 401
+
+        t, err = _new_transaction(uid, request.get_json(silent=True) or {})
+        if err:
+            return jsonify(error=err), 400
+
         db.session.add(t)
         db.session.commit()
         return jsonify(ok=True, id=t.id, row=t.id)
 
+    @app.post("/api/lancamentos/lote")
+    def api_create_lancamentos_lote():
+        """Vários lançamentos num único INSERT/commit (importações, planilhas)."""
+        uid = require_login()
+        if not uid:
+            return jsonify(error="Não logado"), 401
+
+        items = (request.get_json(silent=True) or {}).get("items")
+        if not isinstance(items, list) or not items:
+            return jsonify(error="Envie items: [...]"), 400
+        if len(items) > 500:
+            return jsonify(error="Máximo de 500 lançamentos por lote"), 400
+
+        txs = []
+        for i, dataj in enumerate(items, start=1):
+            t, err = _new_transaction(uid, dataj if isinstance(dataj, dict) else {})
+            if err:
+                return jsonify(error=f"Item {i}: {err}"), 400
+            txs.append(t)
+
+        # Tudo ou nada: um item inválido não grava nenhum.
+        # ids lidos após o flush: depois do commit cada objeto expira e recarregaria com um SELECT.
+        db.session.add_all(txs)
+        db.session.flush()
+        ids = [t.id for t in txs]
+        db.session.commit()
+        return jsonify(ok=True, ids=ids, count=len(ids))
+
     @app.put("/api/lancamentos/<int:row>")
     def api_edit_lancamento(row: int):
         uid = require_login()
@@ -81,6 +158,35 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
 
         payload = request.get_json(silent=True) or {}
 
+        tipo = str(payload.get("tipo") or "").strip().upper()
+        categoria = str(payload.get("categoria") or "").strip()
+        if tipo and categoria and payload.get("data"):
+            # Payload completo (fluxo do app): um único UPDATE, sem SELECT prévio.
+            if tipo not in ("RECEITA", "GASTO"):
+                return jsonify(error="Tipo inválido"), 400
+            try:
+                valor = parse_brl_value(payload.get("valor"))
+            except ValueError as e:
+                return jsonify(error=str(e)), 400
+
+            updated = (
+                Transaction.query
+                .filter_by(id=row, user_id=uid)
+                .update({
+                    Transaction.tipo: tipo,
+                    Transaction.data: parse_date_any(payload.get("data")),
+                    Transaction.categoria: categoria.title(),
+                    Transaction.descricao: str(payload.get("descricao") or "").strip() or None,
+                    Transaction.valor: valor,
+                }, synchronize_session=False)
+            )
+            if not updated:
+                db.session.rollback()
+                return jsonify(error="Sem permissão ou inexistente"), 403
+
+            db.session.commit()
+            return jsonify(ok=True)
+
         t = Transaction.query.filter_by(id=row, user_id=uid).first()
         if not t:
             return jsonify(error="Sem permissão ou inexistente"), 403
@@ -90,7 +196,8 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
             return jsonify(error="Tipo inválido"), 400
 
         t.tipo = tipo
-        t.data = parse_date_any(payload.get("data") or t.data.isoformat())
+        if payload.get("data"):
+            t.data = parse_date_any(payload.get("data"))
         t.categoria = (str(payload.get("categoria") or t.categoria).strip() or "Outros").title()
         t.descricao = str(payload.get("descricao") or "").strip() or None
 
@@ -108,10 +215,11 @@ def register_finance_routes(app, db, Transaction, require_login, parse_date_any,
         if not uid:
             return jsonify(error="Não logado"), 401
 
-        t = Transaction.query.filter_by(id=row, user_id=uid).first()
-        if not t:
+        # DELETE direto com o dono no WHERE; rowcount diz se existia.
+        deleted = Transaction.query.filter_by(id=row, user_id=uid).delete(synchronize_session=False)
+        if not deleted:
+            db.session.rollback()
             return jsonify(error="Sem permissão ou inexistente"), 403
 
-        db.session.delete(t)
         db.session.commit()
         return jsonify(ok=True)
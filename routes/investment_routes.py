@@ -9,7 +9,20 @@ def register_investment_routes(app, db, Investment, require_login, parse_money_b
             return jsonify({"error": "Não logado"}), 401
 
         limit = int(request.args.get("limit", "50"))
-        q = Investment.query.filter_by(user_id=user_id).order_by(Investment.data.desc(), Investment.id.desc())
+        # Só as colunas da resposta, como tuplas (sem montar objetos ORM por linha).
+        q = (
+            Investment.query
+            .with_entities(
+                Investment.id,
+                Investment.data,
+                Investment.ativo,
+                Investment.tipo,
+                Investment.valor,
+                Investment.descricao,
+            )
+            .filter_by(user_id=user_id)
+            .order_by(Investment.data.desc(), Investment.id.desc())
+        )
         items = q.limit(min(limit, 200)).all()
 
         out = []
@@ -61,10 +74,10 @@ def register_investment_routes(app, db, Investment, require_login, parse_money_b
         if not user_id:
             return jsonify({"error": "Não logado"}), 401
 
-        it = Investment.query.filter_by(user_id=user_id, id=item_id).first()
-        if not it:
+        deleted = Investment.query.filter_by(user_id=user_id, id=item_id).delete(synchronize_session=False)
+        if not deleted:
+            db.session.rollback()
             return jsonify({"error": "Investimento não encontrado."}), 404
 
-        db.session.delete(it)
         db.session.commit()
         return jsonify({"ok": True})
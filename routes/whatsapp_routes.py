@@ -1,12 +1,22 @@
 
 # -*- coding: utf-8 -*-
-import json
+from collections import namedtuple
 from datetime import datetime, date, timedelta
 
 from flask import request, jsonify
+from sqlalchemy.exc import IntegrityError
 
+from utils_json import loads as json_loads
 from whatsapp_commands import WEEKDAY_MAP
 
+# Nome do dia por número (0=seg), montado uma vez em vez de a cada recorrente listada.
+WEEKDAY_NAMES = {v: k for k, v in WEEKDAY_MAP.items()}
+
+# Vínculo número -> usuário lido a cada mensagem (só o user_id, sem objeto ORM).
+# Sem cache em memória: com vários workers, um "conectar" ou panic_reset num deles
+# deixaria os outros gravando no usuário antigo.
+_LinkRef = namedtuple("_LinkRef", "wa_from user_id")
+
 
 def register_whatsapp_routes(
     app,
@@ -46,6 +56,10 @@ def register_whatsapp_routes(
     looks_like_finance_question,
     reply_finance_question,
 ):
+    def _load_link(wa_from: str):
+        row = WaLink.query.with_entities(WaLink.user_id).filter_by(wa_from=wa_from).first()
+        return _LinkRef(wa_from, row.user_id) if row else None
+
     @app.get("/webhooks/whatsapp")
     def wa_verify():
         mode = request.args.get("hub.mode")
@@ -73,11 +87,15 @@ def register_whatsapp_routes(
                         wa_from = normalize_wa_number(msg.get("from") or "")
                         body = ((msg.get("text") or {}) or {}).get("body", "") or ""
 
-                        if msg_id and ProcessedMessage.query.filter_by(msg_id=msg_id).first():
-                            continue
                         if msg_id:
+                            # Dedup num só INSERT: a unique de msg_id recusa o reenvio,
+                            # sem o SELECT prévio (e sem corrida entre retries simultâneos).
                             db.session.add(ProcessedMessage(msg_id=msg_id, wa_from=wa_from))
-                            db.session.commit()
+                            try:
+                                db.session.commit()
+                            except IntegrityError:
+                                db.session.rollback()
+                                continue
 
                         parsed = parse_wa_text(body) if msg_type == "text" else {"cmd": "MEDIA", "media_type": msg_type}
 
@@ -113,7 +131,7 @@ def register_whatsapp_routes(
                             )
                             continue
 
-                        link = WaLink.query.filter_by(wa_from=wa_from).first()
+                        link = _load_link(wa_from)
                         if not link:
                             wa_send_text(
                                 wa_from,
@@ -180,7 +198,7 @@ def register_whatsapp_routes(
                                 wa_send_text(wa_from, "Pendência não reconhecida. Digite 'ajuda'.")
                                 continue
 
-                            payload_tx = json.loads(pending.payload_json)
+                            payload_tx = json_loads(pending.payload_json)
                             payload_tx["tipo"] = parsed["tipo"]
 
                             guessed = guess_category_from_text(link.user_id, payload_tx.get("raw_text", ""))
@@ -303,7 +321,22 @@ def register_whatsapp_routes(
                             continue
 
                         if parsed["cmd"] == "REC_LIST":
-                            rules = RecurringRule.query.filter_by(user_id=link.user_id).order_by(RecurringRule.id.desc()).limit(30).all()
+                            rules = (
+                                RecurringRule.query
+                                .with_entities(
+                                    RecurringRule.id,
+                                    RecurringRule.freq,
+                                    RecurringRule.day_of_month,
+                                    RecurringRule.weekday,
+                                    RecurringRule.valor,
+                                    RecurringRule.categoria,
+                                    RecurringRule.next_run,
+                                )
+                                .filter_by(user_id=link.user_id)
+                                .order_by(RecurringRule.id.desc())
+                                .limit(30)
+                                .all()
+                            )
                             if not rules:
                                 wa_send_text(wa_from, "Você ainda não tem recorrentes. Ex: recorrente mensal 5 1200 aluguel")
                             else:
@@ -313,8 +346,7 @@ def register_whatsapp_routes(
                                     if r.freq == "MONTHLY":
                                         extra = f"dia {r.day_of_month}"
                                     elif r.freq == "WEEKLY":
-                                        inv = {v: k for k, v in WEEKDAY_MAP.items()}
-                                        extra = f"{inv.get(r.weekday, 'dia')}"
+                                        extra = f"{WEEKDAY_NAMES.get(r.weekday, 'dia')}"
                                     lines.append(
                                         f"• ID {r.id} | {r.freq} {extra} | R$ {fmt_brl(r.valor)} | {r.categoria} | próximo {r.next_run.isoformat()}"
                                     )
@@ -325,11 +357,11 @@ def register_whatsapp_routes(
 
                         if parsed["cmd"] == "REC_DEL":
                             rid = parsed["id"]
-                            r = RecurringRule.query.filter_by(id=rid, user_id=link.user_id).first()
-                            if not r:
+                            deleted = RecurringRule.query.filter_by(id=rid, user_id=link.user_id).delete(synchronize_session=False)
+                            if not deleted:
+                                db.session.rollback()
                                 wa_send_text(wa_from, "Não achei essa recorrente (ou não é sua). Use: recorrentes")
                                 continue
-                            db.session.delete(r)
                             db.session.commit()
                             wa_send_text(wa_from, f"✅ Recorrente removida: ID {rid}")
                             continue
@@ -340,7 +372,14 @@ def register_whatsapp_routes(
                             continue
 
                         if parsed["cmd"] == "ULTIMOS":
-                            txs = Transaction.query.filter(Transaction.user_id == link.user_id).order_by(Transaction.id.desc()).limit(5).all()
+                            txs = (
+                                Transaction.query
+                                .with_entities(Transaction.id, Transaction.tipo, Transaction.valor, Transaction.categoria, Transaction.data)
+                                .filter(Transaction.user_id == link.user_id)
+                                .order_by(Transaction.id.desc())
+                                .limit(5)
+                                .all()
+                            )
                             if not txs:
                                 wa_send_text(wa_from, "Você ainda não tem lançamentos.")
                             else:
@@ -354,11 +393,11 @@ def register_whatsapp_routes(
 
                         if parsed["cmd"] == "APAGAR":
                             txid = parsed["id"]
-                            ttx = Transaction.query.filter_by(id=txid, user_id=link.user_id).first()
-                            if not ttx:
+                            deleted = Transaction.query.filter_by(id=txid, user_id=link.user_id).delete(synchronize_session=False)
+                            if not deleted:
+                                db.session.rollback()
                                 wa_send_text(wa_from, "Não achei esse ID (ou não é seu). Use: ultimos")
                                 continue
-                            db.session.delete(ttx)
                             db.session.commit()
                             wa_send_text(wa_from, f"✅ Apagado: ID {txid}")
                             continue
@@ -233,12 +233,12 @@ async function loadDashboard() {
     state.dashboardMonth = mes;
     state.dashboardYear = ano;
 
-    const [dash, insights, proj, patr] = await Promise.all([
-      api(`/api/dashboard?mes=${mes}&ano=${ano}`),
-      api(`/api/insights_dashboard?mes=${mes}&ano=${ano}`),
-      api('/api/projecao'),
-      api('/api/patrimonio?months=6'),
-    ]);
+    const {
+      dashboard: dash,
+      insights,
+      projecao: proj,
+      patrimonio: patr,
+    } = await api(`/api/painel?mes=${mes}&ano=${ano}&months=6`);
 
     const receitasFmt = fmtBRL(dash.receitas);
     const gastosFmt = fmtBRL(dash.gastos);
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+
 from flask import session
 
 from utils_core import normalize_email, hash_password
@@ -23,7 +25,6 @@ def get_or_create_user_by_email(User, db, email: str, password: str | None = Non
         return u
 
     if password is None:
-        import os
         pw_hash = hash_password(os.urandom(16).hex())
         u = User(email=email, password_hash=pw_hash, password_set=False)
     else:
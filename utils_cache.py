@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from flask import g, has_app_context
+
+
+def request_memo(key, loader):
+    """Memoiza `loader()` durante o request atual (flask.g)."""
+    if not has_app_context():
+        return loader()
+
+    cache = g.setdefault("_memo", {})
+    if key not in cache:
+        cache[key] = loader()
+    return cache[key]
+
+
+def clear_request_memo(*_args, **_kwargs):
+    if has_app_context():
+        g.pop("_memo", None)
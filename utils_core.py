@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import re
-import json
 import hashlib
 import calendar
 from datetime import datetime, date, timedelta
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from utils_json import loads as json_loads
 
 
 def hash_password(pw: str) -> str:
@@ -15,20 +17,32 @@ def normalize_email(email: str) -> str:
     return str(email or "").strip().lower()
 
 
+_MONEY_JUNK_RE = re.compile(r"[^0-9,\.-]")
+# Caso comum ("32,90", "1000", "18.5"): sem símbolo, espaço nem separador de milhar.
+_MONEY_SIMPLE_RE = re.compile(r"-?[0-9]+(?:[.,][0-9]+)?")
+
+
 def parse_brl_value(v) -> Decimal:
     if v is None:
         raise ValueError("valor vazio")
     s = str(v).strip()
     if not s:
         raise ValueError("valor vazio")
+    return _parse_brl_str(s)
 
-    s = re.sub(r"[^0-9,\.-]", "", s)
 
-    if "." in s and "," in s:
-        s = s.replace(".", "").replace(",", ".")
-    else:
-        if "," in s and "." not in s:
-            s = s.replace(",", ".")
+@lru_cache(maxsize=4096)
+def _parse_brl_str(s: str) -> Decimal:
+    # Os mesmos valores se repetem (lotes, recorrentes, WhatsApp) e Decimal é imutável;
+    # texto inválido levanta ValueError e não entra no cache.
+    if _MONEY_SIMPLE_RE.fullmatch(s):
+        return Decimal(s.replace(",", "."))
+
+    s = _MONEY_JUNK_RE.sub("", s)
+
+    if "," in s:
+        # "1.234,56" -> "1234.56"; "12,5" -> "12.5"
+        s = s.replace(".", "").replace(",", ".") if "." in s else s.replace(",", ".")
 
     try:
         return Decimal(s)
@@ -36,26 +50,40 @@ def parse_brl_value(v) -> Decimal:
         raise ValueError("valor inválido")
 
 
+@lru_cache(maxsize=4096)
+def _parse_date_str(s: str) -> date | None:
+    # Poucas datas distintas se repetem muito (lançamentos, recorrentes, IA);
+    # o "hoje" do fallback fica fora do cache porque muda.
+    # Os três formatos aceitos têm 10 caracteres; fatiamento + date() no lugar de strptime.
+    if len(s) != 10:
+        return None
+    try:
+        if s[4] == "-" and s[7] == "-" and (s[:4] + s[5:7] + s[8:]).isdecimal():
+            return date.fromisoformat(s)
+        if s[2] == s[5] and s[2] in "/-" and (s[:2] + s[3:5] + s[6:]).isdecimal():
+            return date(int(s[6:]), int(s[3:5]), int(s[:2]))
+    except ValueError:
+        pass
+    return None
+
+
 def parse_date_any(v) -> date:
     if not v:
         return datetime.utcnow().date()
-    s = str(v).strip()
-    try:
-        if re.match(r"^\d{4}-\d{2}-\d{2}$", s):
-            return datetime.strptime(s, "%Y-%m-%d").date()
-        if re.match(r"^\d{2}/\d{2}/\d{4}$", s):
-            return datetime.strptime(s, "%d/%m/%Y").date()
-        if re.match(r"^\d{2}-\d{2}-\d{4}$", s):
-            return datetime.strptime(s, "%d-%m-%Y").date()
-    except Exception:
-        pass
-    return datetime.utcnow().date()
+    return _parse_date_str(str(v).strip()) or datetime.utcnow().date()
 
 
 def parse_money_br_to_decimal(value):
     s = str(value or "").strip()
     if not s:
         return Decimal("0")
+    return _parse_money_br_str(s)
+
+
+@lru_cache(maxsize=4096)
+def _parse_money_br_str(s: str) -> Decimal:
+    if _MONEY_SIMPLE_RE.fullmatch(s):
+        return Decimal(s.replace(",", "."))
     s = s.replace(" ", "")
     if "," in s:
         s = s.replace(".", "").replace(",", ".")
@@ -65,27 +93,41 @@ def parse_money_br_to_decimal(value):
         return Decimal("0")
 
 
+_ISO_DATE_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+
 def iso_date(value):
-    s = str(value or "").strip()
+    s = str(value or "").strip()[:10]
+    # fromisoformat é C puro, mas no 3.11 também aceita "20240105" e "2024-W01-1";
+    # só entra com YYYY-MM-DD exato. O resto (ex.: 2024-1-5) segue no strptime.
+    if _ISO_DATE_RE.fullmatch(s):
+        try:
+            return date.fromisoformat(s)
+        except ValueError:
+            pass
     try:
-        return datetime.strptime(s[:10], "%Y-%m-%d").date()
+        return datetime.strptime(s, "%Y-%m-%d").date()
     except Exception:
         return datetime.utcnow().date()
 
 
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
 def extract_json_from_text(raw: str) -> dict:
+    # Resposta da IA: quase sempre JSON puro, lido direto (orjson quando houver).
     raw = (raw or "").strip()
     if not raw:
         return {}
     try:
-        return json.loads(raw)
+        return json_loads(raw)
     except Exception:
         pass
-    m = re.search(r"\{.*\}", raw, re.DOTALL)
+    m = _JSON_OBJECT_RE.search(raw)
     if not m:
         return {}
     try:
-        return json.loads(m.group(0))
+        return json_loads(m.group(0))
     except Exception:
         return {}
 
@@ -118,10 +160,16 @@ def norm_word(w: str) -> str:
     return w
 
 
+_TOKEN_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+
+
 def tokenize(textv: str) -> list[str]:
-    textv = norm_word(textv)
-    parts = re.split(r"[^a-z0-9]+", textv)
-    return [p for p in parts if p]
+    return tokenize_normalized(norm_word(textv))
+
+
+def tokenize_normalized(textv: str) -> list[str]:
+    """tokenize() para texto que já passou por norm_word; não normaliza de novo."""
+    return [p for p in _TOKEN_SPLIT_RE.split(textv) if p]
 
 
 def normalize_wa_number(raw: str) -> str:
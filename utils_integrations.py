@@ -4,9 +4,12 @@ import base64
 import tempfile
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PyPDF2 import PdfReader
 
 from utils_core import normalize_wa_number, parse_brl_value, parse_date_any, extract_json_from_text
+from utils_json import loads as json_loads
 
 _CONFIG = {
     "wa_access_token": "",
@@ -19,6 +22,23 @@ _CONFIG = {
 }
 
 
+def _build_http_session() -> requests.Session:
+    # Sessão única por processo: reaproveita conexões keep-alive (TLS) com a
+    # Graph API e a OpenAI em vez de abrir uma nova a cada chamada.
+    # Só falhas de conexão são repetidas; um POST que chegou ao servidor não.
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2),
+    )
+    s = requests.Session()
+    s.mount("https://", adapter)
+    return s
+
+
+http_session = _build_http_session()
+
+
 def init_integrations(
     *,
     wa_access_token: str,
@@ -58,7 +78,7 @@ def wa_send_text(to_number: str, text_msg: str):
         "text": {"body": str(text_msg or "")[:3900]},
     }
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=20)
+        r = http_session.post(url, headers=headers, json=payload, timeout=20)
         if r.status_code >= 400:
             print("WA send error:", r.status_code, r.text)
     except Exception as e:
@@ -82,9 +102,9 @@ def _download_whatsapp_media(media_id: str, fallback_name: str = "arquivo"):
 
     meta_url = f"https://graph.facebook.com/{_CONFIG['graph_version']}/{media_id}"
     headers = {"Authorization": f"Bearer {_CONFIG['wa_access_token']}"}
-    r = requests.get(meta_url, headers=headers, timeout=20)
+    r = http_session.get(meta_url, headers=headers, timeout=20)
     r.raise_for_status()
-    meta = r.json()
+    meta = json_loads(r.content)
 
     dl_url = meta.get("url")
     mime_type = meta.get("mime_type") or "application/octet-stream"
@@ -98,7 +118,7 @@ def _download_whatsapp_media(media_id: str, fallback_name: str = "arquivo"):
     }
     ext = ext_map.get(mime_type, "")
 
-    r2 = requests.get(dl_url, headers=headers, timeout=60)
+    r2 = http_session.get(dl_url, headers=headers, timeout=60)
     r2.raise_for_status()
 
     fd, tmp_path = tempfile.mkstemp(prefix="wa_media_", suffix=ext)
@@ -115,7 +135,7 @@ def _transcribe_audio_file(file_path: str) -> str:
     with open(file_path, "rb") as f:
         files = {"file": (os.path.basename(file_path), f, "application/octet-stream")}
         data = {"model": _CONFIG["openai_transcribe_model"]}
-        r = requests.post(
+        r = http_session.post(
             "https://api.openai.com/v1/audio/transcriptions",
             headers={"Authorization": f"Bearer {_CONFIG['openai_api_key']}"},
             files=files,
@@ -123,7 +143,7 @@ def _transcribe_audio_file(file_path: str) -> str:
             timeout=120,
         )
     r.raise_for_status()
-    return (r.json().get("text") or "").strip()
+    return (json_loads(r.content).get("text") or "").strip()
 
 
 def _extract_pdf_text(file_path: str) -> str:
@@ -197,14 +217,14 @@ def _call_openai_finance_json(user_prompt: str, image_base64: str | None = None,
         "response_format": {"type": "json_object"},
     }
 
-    r = requests.post(
+    r = http_session.post(
         "https://api.openai.com/v1/chat/completions",
         headers=_openai_headers(),
         json=payload,
         timeout=120,
     )
     r.raise_for_status()
-    raw = r.json()["choices"][0]["message"]["content"]
+    raw = json_loads(r.content)["choices"][0]["message"]["content"]
     return _normalize_ai_result(extract_json_from_text(raw))
 
 
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele fica o provider padrão do Flask
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider do Flask usando orjson para serializar respostas e ler corpos.
+
+    Mantém a saída do provider padrão: chaves ordenadas e date/datetime/Decimal
+    passando pelo mesmo `default` do Flask.
+    """
+
+    _OPTS = (
+        (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        if orjson else 0
+    )
+
+    def _dumpb(self, obj) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._OPTS)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumpb(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity e inteiros enormes: o json da stdlib aceita, o orjson não.
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+
+def dumps(obj) -> str:
+    """JSON compacto em UTF-8 (como json.dumps(ensure_ascii=False)), via orjson quando houver."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(s):
+    """Lê JSON de str/bytes; o que o orjson recusa (NaN etc.) cai no json da stdlib."""
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(s)
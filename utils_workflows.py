@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
-import json
 import os
 import re
+import threading
 from datetime import datetime, timedelta, date
+from functools import lru_cache
+
+from sqlalchemy import insert
 
 from finance_services import WEEKDAY_MAP
 from utils_core import (
@@ -22,13 +25,16 @@ from utils_integrations import (
     _transcribe_audio_file,
     wa_send_text,
 )
+from utils_json import dumps as json_dumps, loads as json_loads
 
 
+@lru_cache(maxsize=1)
 def _get_runtime_objects():
+    # Import tardio (evita import circular com app.py); resolvido uma vez por processo.
     from app import db, Transaction, WaPending, WaLink, RecurringRule
     return db, Transaction, WaPending, WaLink, RecurringRule
 
-def _save_ai_transaction(user_id: int, tx_data: dict, origem: str = "WA"):
+def _save_ai_transaction(user_id: int, tx_data: dict, origem: str = "WA", clear_pending_for: str | None = None):
     db, Transaction, WaPending, WaLink, RecurringRule = _get_runtime_objects()
     tx = Transaction(
         user_id=user_id,
@@ -40,24 +46,49 @@ def _save_ai_transaction(user_id: int, tx_data: dict, origem: str = "WA"):
         origem=origem,
     )
     db.session.add(tx)
+    if clear_pending_for:
+        # Mesma transação do INSERT: um único commit em vez de salvar e depois limpar.
+        WaPending.query.filter_by(wa_from=clear_pending_for, user_id=user_id).delete()
     db.session.commit()
     return tx
 
 
+# Respostas já passam por norm_word (minúsculas, sem acento); lookup O(1) por hash.
+_CONFIRM_WORDS = frozenset({"1", "sim", "s", "confirmar", "ok"})
+_CANCEL_WORDS = frozenset({"2", "nao", "n", "cancelar", "cancela"})
+
+
 def _pending_confirmation_choice(text_msg: str) -> str | None:
     norm = norm_word(text_msg)
-    if norm in ("1", "sim", "s", "confirmar", "ok"):
+    if norm in _CONFIRM_WORDS:
         return "confirm"
-    if norm in ("2", "nao", "não", "n", "cancelar", "cancela"):
+    if norm in _CANCEL_WORDS:
         return "cancel"
     return None
 
 
+# Limpeza de pendências vencidas: no máximo uma vez por intervalo, por processo.
+_PENDING_PURGE_EVERY = timedelta(minutes=5)
+_pending_purge_lock = threading.Lock()
+_pending_purged_at = datetime.min
+
+
+def _purge_expired_pending(now: datetime):
+    global _pending_purged_at
+    with _pending_purge_lock:
+        if now - _pending_purged_at < _PENDING_PURGE_EVERY:
+            return
+        _pending_purged_at = now
+    db, Transaction, WaPending, WaLink, RecurringRule = _get_runtime_objects()
+    WaPending.query.filter(WaPending.expires_at < now).delete(synchronize_session=False)
+    db.session.commit()
+
+
 def _pending_get(wa_from: str):
     db, Transaction, WaPending, WaLink, RecurringRule = _get_runtime_objects()
     now = datetime.utcnow()
-    WaPending.query.filter(WaPending.wa_from == wa_from, WaPending.expires_at < now).delete()
-    db.session.commit()
+    # O SELECT já ignora vencidas; o DELETE não precisa rodar a cada mensagem.
+    _purge_expired_pending(now)
     return (
         WaPending.query
         .filter(WaPending.wa_from == wa_from, WaPending.expires_at >= now)
@@ -68,13 +99,13 @@ def _pending_get(wa_from: str):
 
 def _pending_set(wa_from: str, user_id: int, kind: str, payload: dict, minutes: int = 10):
     db, Transaction, WaPending, WaLink, RecurringRule = _get_runtime_objects()
+    # Troca o pendente anterior pelo novo num único commit.
     WaPending.query.filter_by(wa_from=wa_from, user_id=user_id).delete()
-    db.session.commit()
     p = WaPending(
         wa_from=wa_from,
         user_id=user_id,
         kind=kind,
-        payload_json=json.dumps(payload, ensure_ascii=False),
+        payload_json=json_dumps(payload),
         expires_at=datetime.utcnow() + timedelta(minutes=minutes),
     )
     db.session.add(p)
@@ -100,10 +131,9 @@ def _handle_pending_ai_confirmation(wa_from: str, user_id: int, text_msg: str) -
         wa_send_text(wa_from, "❌ Lançamento cancelado. Pode enviar outro comprovante, PDF, foto ou áudio.")
         return True
 
-    payload = json.loads(pending.payload_json or "{}")
+    payload = json_loads(pending.payload_json or "{}")
     tx_data = payload.get("tx") or {}
-    tx = _save_ai_transaction(user_id, tx_data, origem="WA")
-    _pending_clear(wa_from, user_id)
+    tx = _save_ai_transaction(user_id, tx_data, origem="WA", clear_pending_for=wa_from)
     wa_send_text(
         wa_from,
         "✅ Lançamento salvo!\n"
@@ -363,28 +393,28 @@ def _create_recurring_rule(user_id: int, freq_raw: str, parts: list[str]):
 def _run_recorrentes_for_user(user_id: int, today: date | None = None):
     db, Transaction, WaPending, WaLink, RecurringRule = _get_runtime_objects()
     today = today or datetime.utcnow().date()
-    created = 0
+    new_rows = []
 
+    # Só as regras já vencidas: as demais não gerariam lançamento nesta rodada.
     rules = (
         RecurringRule.query
         .filter(RecurringRule.user_id == user_id, RecurringRule.is_active.is_(True))
+        .filter(RecurringRule.next_run <= today)
         .order_by(RecurringRule.id.asc())
         .all()
     )
 
     for r in rules:
         while r.next_run <= today:
-            tx = Transaction(
-                user_id=user_id,
-                tipo=r.tipo,
-                data=r.next_run,
-                categoria=r.categoria,
-                descricao=r.descricao,
-                valor=r.valor,
-                origem="REC",
-            )
-            db.session.add(tx)
-            created += 1
+            new_rows.append({
+                "user_id": user_id,
+                "tipo": r.tipo,
+                "data": r.next_run,
+                "categoria": r.categoria,
+                "descricao": r.descricao,
+                "valor": r.valor,
+                "origem": "REC",
+            })
 
             if r.freq == "DAILY":
                 r.next_run = r.next_run + timedelta(days=1)
@@ -397,8 +427,11 @@ def _run_recorrentes_for_user(user_id: int, today: date | None = None):
                 r.is_active = False
                 break
 
+    # Um único INSERT em lote (executemany) em vez de um flush por lançamento.
+    if new_rows:
+        db.session.execute(insert(Transaction), new_rows)
     db.session.commit()
-    return created
+    return len(new_rows)
 
 def parse_kv_assignments(text: str):
     result = {}
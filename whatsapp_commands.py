@@ -2,13 +2,14 @@
 import re
 from datetime import datetime
 
-from utils_core import norm_word, tokenize, parse_brl_value
+from utils_core import norm_word, tokenize_normalized, parse_brl_value
 from utils_auth import normalize_email
 from utils_workflows import parse_kv_assignments
 
 CONNECT_ALIASES = ("conectar", "vincular", "linkar", "associar", "registrar", "conexao", "conexão")
 NEGATIONS = {"nao", "não", "nunca", "jamais"}
 
+_SPACES_RE = re.compile(r"\s+")
 VALUE_RE = re.compile(r"([+\-])?\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})|\d+(?:[.,]\d{1,2})?)")
 
 INCOME_HINTS = {
@@ -22,6 +23,12 @@ EXPENSE_HINTS = {
     "saida", "saída", "debito", "débito", "boleto", "conta", "fatura", "cartao", "cartão",
 }
 
+# Versões normalizadas (norm_word) calculadas uma vez no import, não a cada mensagem.
+_INCOME_SET = frozenset(norm_word(x) for x in INCOME_HINTS)
+_EXPENSE_SET = frozenset(norm_word(x) for x in EXPENSE_HINTS)
+_NEGATION_SET = frozenset(norm_word(n) for n in NEGATIONS)
+_CONNECT_PREFIXES = tuple(norm_word(a) + " " for a in CONNECT_ALIASES)
+
 CMD_HELP_RE = re.compile(r"^\s*(ajuda|\?|help)\s*$", re.IGNORECASE)
 CMD_ULTIMOS_RE = re.compile(r"^\s*ultimos\s*$", re.IGNORECASE)
 CMD_APAGAR_RE = re.compile(r"^\s*apagar\s+(\d+)\s*$", re.IGNORECASE)
@@ -64,18 +71,15 @@ def detect_tipo_with_score(sign: str, before_tokens: list[str], after_tokens: li
     bset = set(before_tokens)
     aset = set(after_tokens)
 
-    income_set = {norm_word(x) for x in INCOME_HINTS}
-    expense_set = {norm_word(x) for x in EXPENSE_HINTS}
-
-    b_income = len(bset & income_set)
-    b_exp = len(bset & expense_set)
-    a_income = len(aset & income_set)
-    a_exp = len(aset & expense_set)
+    b_income = len(bset & _INCOME_SET)
+    b_exp = len(bset & _EXPENSE_SET)
+    a_income = len(aset & _INCOME_SET)
+    a_exp = len(aset & _EXPENSE_SET)
 
     score_income = (b_income * 3) + a_income
     score_exp = (b_exp * 3) + a_exp
 
-    has_neg = any(t in {norm_word(n) for n in NEGATIONS} for n in NEGATIONS for t in before_tokens[:2])
+    has_neg = any(t in _NEGATION_SET for t in before_tokens[:2])
     if has_neg and score_income > 0 and score_exp == 0:
         score_income = 0
 
@@ -214,12 +218,10 @@ def parse_wa_text(msg_text: str):
     if low_simple in ("receita", "gasto"):
         return {"cmd": "CONFIRM_TIPO", "tipo": "RECEITA" if low_simple == "receita" else "GASTO"}
 
-    low = norm_word(t)
-    low = re.sub(r"\s+", " ", low).strip()
-    for alias in CONNECT_ALIASES:
-        if low.startswith(norm_word(alias) + " "):
-            email = t.split(" ", 1)[1].strip()
-            return {"cmd": "CONNECT", "email": normalize_email(email)}
+    low = _SPACES_RE.sub(" ", low_simple).strip()
+    if low.startswith(_CONNECT_PREFIXES):
+        email = t.split(" ", 1)[1].strip()
+        return {"cmd": "CONNECT", "email": normalize_email(email)}
 
     m = VALUE_RE.search(low)
     if not m:
@@ -235,8 +237,9 @@ def parse_wa_text(msg_text: str):
     before = (low[:m.start()] or "").strip()
     after = (low[m.end():] or "").strip(" -–—")
 
-    before_tokens = tokenize(before)
-    after_tokens = tokenize(after)
+    # "low" já saiu de norm_word: só separa os tokens, sem normalizar de novo.
+    before_tokens = tokenize_normalized(before)
+    after_tokens = tokenize_normalized(after)
 
     tipo, confidence = detect_tipo_with_score(sign, before_tokens, after_tokens)
 